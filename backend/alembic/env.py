@@ -1,8 +1,10 @@
+import logging
 import sys
 from logging.config import fileConfig
 from pathlib import Path
 
 from sqlalchemy import engine_from_config, pool
+from sqlalchemy.engine import make_url
 
 from alembic import context
 
@@ -10,10 +12,9 @@ from alembic import context
 project_root = Path(__file__).parent.parent
 sys.path.insert(0, str(project_root))
 
-# 导入应用配置和模型（必须在路径设置之后）
+# 导入应用配置（必须在路径设置之后）
 if True:  # noqa: SIM108
     from app.core.config import settings
-    from app.db.models import Base
 
 # this is the Alembic Config object, which provides
 # access to the values within the .ini file in use.
@@ -21,12 +22,26 @@ config = context.config
 
 # Interpret the config file for Python logging.
 # This line sets up loggers basically.
-if config.config_file_name is not None:
+if config.config_file_name is not None and not logging.getLogger().handlers:
     fileConfig(config.config_file_name)
 
-# add your model's MetaData object here
-# for 'autogenerate' support
-target_metadata = Base.metadata
+
+def load_target_metadata():
+    """按需导入模型并返回 MetaData
+
+    只有 autogenerate 和 `alembic check` 需要比较模型，
+    `alembic upgrade` / `alembic current` 等命令无需为此付出导入整个模型图的开销。
+    """
+    cmd_opts = config.cmd_opts
+    if cmd_opts is not None:
+        cmd = getattr(cmd_opts, "cmd", None)
+        is_check = bool(cmd) and cmd[0].__name__ == "check"
+        if not getattr(cmd_opts, "autogenerate", False) and not is_check:
+            return None
+
+    from app.db.models import Base
+
+    return Base.metadata
 
 # other values from the config, defined by the needs of env.py,
 # can be acquired:
@@ -34,8 +49,12 @@ target_metadata = Base.metadata
 # ... etc.
 
 def get_database_url():
-    """获取数据库URL"""
-    return settings.DATABASE_URL
+    """获取数据库URL
+
+    迁移始终使用同步驱动（psycopg2），即使应用配置的是 asyncpg 连接串。
+    """
+    url = make_url(settings.DATABASE_URL).set(drivername="postgresql+psycopg2")
+    return url.render_as_string(hide_password=False)
 
 def run_migrations_offline() -> None:
     """Run migrations in 'offline' mode.
@@ -52,7 +71,7 @@ def run_migrations_offline() -> None:
     url = get_database_url()
     context.configure(
         url=url,
-        target_metadata=target_metadata,
+        target_metadata=load_target_metadata(),
         literal_binds=True,
         dialect_opts={"paramstyle": "named"},
     )
@@ -79,7 +98,7 @@ def run_migrations_online() -> None:
 
     with connectable.connect() as connection:
         context.configure(
-            connection=connection, target_metadata=target_metadata
+            connection=connection, target_metadata=load_target_metadata()
         )
 
         with context.begin_transaction():
@@ -0,0 +1,43 @@
+"""Convert question options and tags columns to JSONB
+
+Revision ID: 221c2bf42811
+Revises: 85f41244470d
+Create Date: 2026-10-15 10:05:19.804412
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision = '221c2bf42811'
+down_revision = '85f41244470d'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.alter_column('questions', 'options',
+               existing_type=sa.JSON(),
+               type_=postgresql.JSONB(),
+               existing_nullable=True,
+               postgresql_using='options::jsonb')
+    op.alter_column('questions', 'tags',
+               existing_type=sa.JSON(),
+               type_=postgresql.JSONB(),
+               existing_nullable=True,
+               postgresql_using='tags::jsonb')
+
+
+def downgrade() -> None:
+    op.alter_column('questions', 'tags',
+               existing_type=postgresql.JSONB(),
+               type_=sa.JSON(),
+               existing_nullable=True,
+               postgresql_using='tags::json')
+    op.alter_column('questions', 'options',
+               existing_type=postgresql.JSONB(),
+               type_=sa.JSON(),
+               existing_nullable=True,
+               postgresql_using='options::json')
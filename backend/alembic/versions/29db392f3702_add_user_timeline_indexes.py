@@ -0,0 +1,43 @@
+"""Add (user_id, time) composite indexes for per-user history queries
+
+Revision ID: 29db392f3702
+Revises: 221c2bf42811
+Create Date: 2026-10-15 20:31:07.582934
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '29db392f3702'
+down_revision = '221c2bf42811'
+branch_labels = None
+depends_on = None
+
+# 答题记录、学习记录、对话历史都是“按用户过滤 + 按时间倒序取最近 N 条”，
+# 复合索引可以直接按序扫描，无需排序
+INDEXES = [
+    ('ix_user_answers_user_created', 'user_answers', ['user_id', 'created_at']),
+    ('ix_study_records_user_study_date', 'study_records', ['user_id', 'study_date']),
+    ('ix_ai_conversations_user_created', 'ai_conversations', ['user_id', 'created_at']),
+]
+
+
+def upgrade() -> None:
+    # CONCURRENTLY 不能在事务中执行，且建索引期间不阻塞写入
+    with op.get_context().autocommit_block():
+        for name, table, columns in INDEXES:
+            op.create_index(
+                name, table, columns,
+                unique=False, postgresql_concurrently=True, if_not_exists=True,
+            )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        for name, table, _ in reversed(INDEXES):
+            op.drop_index(
+                name, table_name=table,
+                postgresql_concurrently=True, if_exists=True,
+            )
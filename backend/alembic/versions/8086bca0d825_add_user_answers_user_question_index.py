@@ -0,0 +1,33 @@
+"""Add composite index on user_answers (user_id, question_id)
+
+Revision ID: 8086bca0d825
+Revises: b39859c85155
+Create Date: 2026-10-15 09:12:41.318204
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '8086bca0d825'
+down_revision = 'b39859c85155'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # CONCURRENTLY 不能在事务中执行，且建索引期间不阻塞写入
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_user_answers_user_question', 'user_answers', ['user_id', 'question_id'],
+            unique=False, postgresql_concurrently=True, if_not_exists=True,
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            'ix_user_answers_user_question', table_name='user_answers',
+            postgresql_concurrently=True, if_exists=True,
+        )
@@ -0,0 +1,45 @@
+"""Drop redundant indexes on primary key columns
+
+Revision ID: 85f41244470d
+Revises: 8086bca0d825
+Create Date: 2026-10-15 09:40:07.552931
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '85f41244470d'
+down_revision = '8086bca0d825'
+branch_labels = None
+depends_on = None
+
+# 主键本身已有唯一索引，这些 ix_<table>_id 索引完全重复，只会增加写入和存储开销
+TABLES = [
+    'subjects',
+    'users',
+    'questions',
+    'study_records',
+    'ai_conversations',
+    'user_answers',
+    'question_banks',
+]
+
+
+def upgrade() -> None:
+    with op.get_context().autocommit_block():
+        for table in TABLES:
+            op.drop_index(
+                op.f(f'ix_{table}_id'), table_name=table,
+                postgresql_concurrently=True, if_exists=True,
+            )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        for table in TABLES:
+            op.create_index(
+                op.f(f'ix_{table}_id'), table, ['id'],
+                unique=False, postgresql_concurrently=True, if_not_exists=True,
+            )
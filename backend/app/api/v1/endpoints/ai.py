@@ -5,12 +5,14 @@
 """
 
 from fastapi import APIRouter, Depends, HTTPException
-from fastapi.responses import StreamingResponse
-from sqlalchemy.orm import Session
+from fastapi.responses import ORJSONResponse, StreamingResponse
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.core.auth import get_current_active_user
+from app.core.cache import conversation_cache, study_stats_cache
 from app.db import models
-from app.db.database import get_db
+from app.db.database import AsyncSessionLocal, get_async_db
 from app.schemas.ai import (
     AIMessage,
     AIStreamRequest,
@@ -20,58 +22,61 @@ from app.schemas.ai import (
 )
 from app.services.ai_service import ai_service
 
-router = APIRouter()
+router = APIRouter(default_response_class=ORJSONResponse)
 
 @router.post("/chat/stream")
 async def stream_chat(
     request: AIStreamRequest,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: models.User = Depends(get_current_active_user)
 ):
     """流式AI聊天接口"""
+    # 题目上下文在开始流式输出前查询完毕
+    context = request.context
+    if request.question_id:
+        question = await db.get(models.Question, request.question_id)
+        if question:
+            context = f"题目：{question.title}\n内容：{question.content}"
+            if request.conversation_type == "explanation":
+                # 获取用户的答案
+                user_answer = await db.scalar(select(models.UserAnswer).where(
+                    models.UserAnswer.user_id == current_user.id,
+                    models.UserAnswer.question_id == request.question_id
+                ).limit(1))
+                if user_answer:
+                    context += f"\n用户答案：{user_answer.user_answer}\n正确答案：{question.correct_answer}"
+
+    # 构建完整的消息
+    full_message = request.message
+    if context:
+        full_message = f"上下文：{context}\n\n用户问题：{request.message}"
+
+    user_id = current_user.id
+    # AI 流式响应可能持续数十秒，提前归还请求会话占用的连接
+    await db.close()
 
     async def generate_response():
         full_response = ""
         try:
-            # 如果有question_id，获取题目上下文
-            context = request.context
-            if request.question_id:
-                question = db.query(models.Question).filter(
-                    models.Question.id == request.question_id
-                ).first()
-                if question:
-                    context = f"题目：{question.title}\n内容：{question.content}"
-                    if request.conversation_type == "explanation":
-                        # 获取用户的答案
-                        user_answer = db.query(models.UserAnswer).filter(
-                            models.UserAnswer.user_id == current_user.id,
-                            models.UserAnswer.question_id == request.question_id
-                        ).first()
-                        if user_answer:
-                            context += f"\n用户答案：{user_answer.user_answer}\n正确答案：{question.correct_answer}"
-
-            # 构建完整的消息
-            full_message = request.message
-            if context:
-                full_message = f"上下文：{context}\n\n用户问题：{request.message}"
-
             async for chunk in ai_service.stream_chat(
                 message=full_message,
-                user_id=str(current_user.id)
+                user_id=str(user_id)
             ):
                 full_response += chunk
                 yield f"data: {chunk}\n\n"
 
-            # 保存对话记录
-            conversation = models.AIConversation(
-                user_id=current_user.id,
-                question_id=request.question_id,
-                user_message=request.message,
-                ai_response=full_response,
-                conversation_type=request.conversation_type
-            )
-            db.add(conversation)
-            db.commit()
+            # 保存对话记录：使用独立的短生命周期会话，只在写入时占用连接
+            async with AsyncSessionLocal() as save_db:
+                conversation = models.AIConversation(
+                    user_id=user_id,
+                    question_id=request.question_id,
+                    user_message=request.message,
+                    ai_response=full_response,
+                    conversation_type=request.conversation_type
+                )
+                save_db.add(conversation)
+                await save_db.commit()
+            conversation_cache.pop(user_id)
 
             yield "data: [DONE]\n\n"
 
@@ -80,7 +85,7 @@ async def stream_chat(
 
     return StreamingResponse(
         generate_response(),
-        media_type="text/plain",
+        media_type="text/event-stream",
         headers={
             "Cache-Control": "no-cache",
             "Connection": "keep-alive",
@@ -92,20 +97,18 @@ async def stream_chat(
 @router.post("/explanation/{question_id}")
 async def get_explanation(
     question_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: models.User = Depends(get_current_active_user)
 ):
     """获取题目解析"""
-    question = db.query(models.Question).filter(
-        models.Question.id == question_id
-    ).first()
+    question = await db.get(models.Question, question_id)
     if not question:
         raise HTTPException(status_code=404, detail="Question not found")
 
-    user_answer = db.query(models.UserAnswer).filter(
+    user_answer = await db.scalar(select(models.UserAnswer).where(
         models.UserAnswer.user_id == current_user.id,
         models.UserAnswer.question_id == question_id
-    ).first()
+    ).limit(1))
 
     if not user_answer:
         raise HTTPException(status_code=400, detail="Please answer the question first")
@@ -126,20 +129,19 @@ async def get_explanation(
         conversation_type="explanation"
     )
     db.add(conversation)
-    db.commit()
+    await db.commit()
+    conversation_cache.pop(current_user.id)
 
     return {"explanation": explanation}
 
 @router.post("/hint/{question_id}")
 async def get_hint(
     question_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: models.User = Depends(get_current_active_user)
 ):
     """获取题目提示"""
-    question = db.query(models.Question).filter(
-        models.Question.id == question_id
-    ).first()
+    question = await db.get(models.Question, question_id)
     if not question:
         raise HTTPException(status_code=404, detail="Question not found")
 
@@ -157,82 +159,107 @@ async def get_hint(
         conversation_type="hint"
     )
     db.add(conversation)
-    db.commit()
+    await db.commit()
+    conversation_cache.pop(current_user.id)
 
     return {"hint": hint}
 
 @router.get("/conversations", response_model=list[AIMessage])
 async def get_conversations(
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: models.User = Depends(get_current_active_user)
 ):
     """获取AI对话历史"""
-    conversations = db.query(models.AIConversation).filter(
-        models.AIConversation.user_id == current_user.id
-    ).order_by(models.AIConversation.created_at.desc()).limit(50).all()
+    cached = conversation_cache.get(current_user.id)
+    if cached is not None:
+        return cached
+
+    # 按列查询返回轻量的行对象，不构造 ORM 实例也不进入 identity map
+    conversation = models.AIConversation
+    result = await db.execute(
+        select(
+            conversation.id,
+            conversation.user_id,
+            conversation.question_id,
+            conversation.user_message,
+            conversation.ai_response,
+            conversation.conversation_type,
+            conversation.created_at,
+        ).where(
+            conversation.user_id == current_user.id
+        ).order_by(conversation.created_at.desc()).limit(50)
+    )
 
+    conversations = result.all()
+    conversation_cache.set(current_user.id, conversations)
     return conversations
 
 # 学习记录相关接口
 @router.post("/study-records", response_model=StudyRecord)
 async def create_study_record(
     record: StudyRecordCreate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: models.User = Depends(get_current_active_user)
 ):
     """创建学习记录"""
     db_record = models.StudyRecord(
         user_id=current_user.id,
-        **record.dict()
+        **record.model_dump()
     )
     db.add(db_record)
-    db.commit()
-    db.refresh(db_record)
+    await db.commit()
+    await db.refresh(db_record)
+    study_stats_cache.pop(current_user.id)
     return db_record
 
 @router.get("/study-stats", response_model=StudyStats)
 async def get_study_stats(
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: models.User = Depends(get_current_active_user)
 ):
     """获取学习统计"""
-    # 获取总答题数
-    total_answers = db.query(models.UserAnswer).filter(
+    cached = study_stats_cache.get(current_user.id)
+    if cached is not None:
+        return cached
+
+    # 总答题数、正确答题数和总学习时间在一次查询中取回
+    answer_stats = select(
+        func.count().label("total"),
+        func.count().filter(models.UserAnswer.is_correct.is_(True)).label("correct"),
+    ).where(
         models.UserAnswer.user_id == current_user.id
-    ).count()
-
-    # 获取正确答题数
-    correct_answers = db.query(models.UserAnswer).filter(
-        models.UserAnswer.user_id == current_user.id,
-        models.UserAnswer.is_correct is True
-    ).count()
+    ).subquery()
+    study_time = select(
+        func.coalesce(func.sum(models.StudyRecord.study_time), 0)
+    ).where(
+        models.StudyRecord.user_id == current_user.id
+    ).scalar_subquery()
+    total_answers, correct_answers, total_time = (await db.execute(
+        select(answer_stats.c.total, answer_stats.c.correct, study_time)
+    )).one()
 
     # 计算正确率
     accuracy_rate = (correct_answers / total_answers * 100) if total_answers > 0 else 0
 
-    # 获取总学习时间
-    total_study_time = db.query(models.StudyRecord).filter(
-        models.StudyRecord.user_id == current_user.id
-    ).with_entities(models.StudyRecord.study_time).all()
-    total_time = sum(record[0] for record in total_study_time)
-
-    # 获取学习过的学科
-    subjects = db.query(models.Subject).join(
-        models.Question
-    ).join(
-        models.UserAnswer
-    ).filter(
-        models.UserAnswer.user_id == current_user.id
-    ).distinct().all()
-
-    subject_names = [subject.name for subject in subjects]
+    # 获取学习过的学科：只查询名称列，不构造完整的 Subject 对象
+    subject_names = (await db.scalars(
+        select(models.Subject.name).join(
+            models.Question
+        ).join(
+            models.UserAnswer
+        ).where(
+            models.UserAnswer.user_id == current_user.id
+        ).distinct()
+    )).all()
 
     # 获取最近的学习记录
-    recent_records = db.query(models.StudyRecord).filter(
-        models.StudyRecord.user_id == current_user.id
-    ).order_by(models.StudyRecord.study_date.desc()).limit(10).all()
+    recent_records = (await db.scalars(
+        select(models.StudyRecord).where(
+            models.StudyRecord.user_id == current_user.id
+        ).order_by(models.StudyRecord.study_date.desc()).limit(10)
+    )).all()
 
-    return StudyStats(
+    stats = StudyStats(
         total_questions=total_answers,
         correct_answers=correct_answers,
         accuracy_rate=round(accuracy_rate, 2),
@@ -240,3 +267,5 @@ async def get_study_stats(
         subjects_studied=subject_names,
         recent_records=recent_records
     )
+    study_stats_cache.set(current_user.id, stats)
+    return stats
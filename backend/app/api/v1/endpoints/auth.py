@@ -5,6 +5,8 @@
 from datetime import timedelta
 
 from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import ORJSONResponse
 from fastapi.security import OAuth2PasswordRequestForm
 from sqlalchemy.orm import Session
 
@@ -21,7 +23,7 @@ from app.db import models
 from app.db.database import get_db
 from app.schemas.auth import Token, User, UserCreate, RefreshTokenRequest
 
-router = APIRouter()
+router = APIRouter(default_response_class=ORJSONResponse)
 
 @router.post("/register", response_model=User)
 async def register(
@@ -43,8 +45,8 @@ async def register(
             detail="Email already registered"
         )
 
-    # 创建新用户
-    hashed_password = get_password_hash(user_data.password)
+    # 创建新用户（bcrypt 计算耗时，放到线程池避免阻塞事件循环）
+    hashed_password = await run_in_threadpool(get_password_hash, user_data.password)
     db_user = models.User(
         username=user_data.username,
         email=user_data.email,
@@ -67,7 +69,10 @@ async def login(
         models.User.username == form_data.username
     ).first()
 
-    if not user or not verify_password(form_data.password, user.hashed_password):
+    # bcrypt 校验耗时，放到线程池避免阻塞事件循环
+    if not user or not await run_in_threadpool(
+        verify_password, form_data.password, user.hashed_password
+    ):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect username or password",
@@ -6,11 +6,14 @@ import logging
 
 from typing import List
 from fastapi import APIRouter, Depends, File, Form, HTTPException, UploadFile
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import ORJSONResponse
+from sqlalchemy.exc import SQLAlchemyError
 from sqlalchemy.orm import Session
 
 from app.core.auth import get_current_active_user
+from app.core.cache import question_cache
 from app.db.database import get_db
-from app.db import models
 from app.schemas.question_bank import (
     QuestionBank,
     QuestionBankImportResponse,
@@ -19,7 +22,11 @@ from app.schemas.question_bank import (
 from app.services.question_bank_service import QuestionBankService
 
 logger = logging.getLogger(__name__)
-router = APIRouter()
+# 题库管理接口全部需要登录，认证依赖统一挂在路由上
+router = APIRouter(
+    default_response_class=ORJSONResponse,
+    dependencies=[Depends(get_current_active_user)],
+)
 
 
 @router.get("/", response_model=List[QuestionBank])
@@ -27,8 +34,7 @@ async def get_question_banks(
     skip: int = 0,
     limit: int = 100,
     subject_id: int | None = None,
-    db: Session = Depends(get_db),
-    current_user: models.User = Depends(get_current_active_user)
+    db: Session = Depends(get_db)
 ):
     """获取题库列表"""
     service = QuestionBankService(db)
@@ -38,8 +44,7 @@ async def get_question_banks(
 @router.get("/{question_bank_id}", response_model=QuestionBank)
 async def get_question_bank(
     question_bank_id: int,
-    db: Session = Depends(get_db),
-    current_user: models.User = Depends(get_current_active_user)
+    db: Session = Depends(get_db)
 ):
     """获取单个题库详情"""
     service = QuestionBankService(db)
@@ -55,8 +60,7 @@ async def upload_question_bank(
     description: str = Form(None, description="题库描述"),
     subject_id: int = Form(..., description="学科ID（必填）"),
     file: UploadFile = File(..., description="题库JSON文件"),
-    db: Session = Depends(get_db),
-    current_user: models.User = Depends(get_current_active_user)
+    db: Session = Depends(get_db)
 ):
     """上传题库文件"""
     # 验证文件类型
@@ -68,9 +72,8 @@ async def upload_question_bank(
         raise HTTPException(status_code=400, detail="文件大小不能超过50MB")
     
     try:
-        # 读取文件内容
-        content = await file.read()
-        file_content = content.decode('utf-8')
+        # 读取文件内容：直接把字节交给JSON解析器，不再额外解码出一份字符串副本
+        file_content = await file.read()
         
         service = QuestionBankService(db)
         
@@ -82,11 +85,12 @@ async def upload_question_bank(
             subject_id=subject_id
         )
         
+        # 解析和导入都是耗时的同步操作（JSON解析、批量写库），放到线程池执行，避免阻塞事件循环
         # 解析文件
-        questions = service.parse_question_bank_file(file_content)
+        questions = await run_in_threadpool(service.parse_question_bank_file, file_content)
         
         # 导入题目
-        import_result = service.import_questions(question_bank.id, questions)
+        import_result = await run_in_threadpool(service.import_questions, question_bank.id, questions)
         
         return QuestionBankImportResponse(
             question_bank_id=question_bank.id,
@@ -96,7 +100,9 @@ async def upload_question_bank(
         
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e)) from e
-    except Exception as e:
+    except SQLAlchemyError as e:
+        # 回滚失败的事务，避免会话停留在 PendingRollback 状态
+        db.rollback()
         logger.error("题库上传失败: %s", e)
         raise HTTPException(status_code=500, detail="题库上传失败，请稍后重试") from e
 
@@ -105,8 +111,7 @@ async def upload_question_bank(
 async def update_question_bank(
     question_bank_id: int,
     question_bank_update: QuestionBankUpdate,
-    db: Session = Depends(get_db),
-    current_user: models.User = Depends(get_current_active_user)
+    db: Session = Depends(get_db)
 ):
     """更新题库信息"""
     service = QuestionBankService(db)
@@ -116,7 +121,7 @@ async def update_question_bank(
         raise HTTPException(status_code=404, detail="题库不存在")
     
     # 更新字段
-    update_data = question_bank_update.dict(exclude_unset=True)
+    update_data = question_bank_update.model_dump(exclude_unset=True)
     for field, value in update_data.items():
         setattr(question_bank, field, value)
     
@@ -128,8 +133,7 @@ async def update_question_bank(
 @router.delete("/{question_bank_id}")
 async def delete_question_bank(
     question_bank_id: int,
-    db: Session = Depends(get_db),
-    current_user: models.User = Depends(get_current_active_user)
+    db: Session = Depends(get_db)
 ):
     """删除题库"""
     service = QuestionBankService(db)
@@ -138,14 +142,15 @@ async def delete_question_bank(
     if not success:
         raise HTTPException(status_code=404, detail="题库不存在")
     
+    # 题目的 question_bank_id 已被清空
+    question_cache.clear()
     return {"message": "题库删除成功"}
 
 
 @router.post("/{question_bank_id}/reimport")
 async def reimport_question_bank(
     question_bank_id: int,
-    db: Session = Depends(get_db),
-    current_user: models.User = Depends(get_current_active_user)
+    db: Session = Depends(get_db)
 ):
     """重新导入题库（如果之前导入失败）"""
     service = QuestionBankService(db)
@@ -4,13 +4,19 @@
 提供题目查询、答题、统计等相关的API接口。
 """
 
-from fastapi import APIRouter, Depends, HTTPException, Query
-from sqlalchemy import and_
-from sqlalchemy.orm import Session
+import hashlib
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from fastapi.responses import ORJSONResponse
+from pydantic import TypeAdapter
+from sqlalchemy import and_, bindparam, delete, func, insert, or_, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
 
 from app.core.auth import get_current_active_user
+from app.core.cache import question_cache, study_stats_cache, subjects_cache
 from app.db import models
-from app.db.database import get_db
+from app.db.database import get_async_db
 from app.schemas.question import (
     AnswerResult,
     PaginatedResponse,
@@ -21,84 +27,136 @@ from app.schemas.question import (
     Subject,
     SubjectCreate,
     UserAnswer,
+    UserAnswerBatchCreate,
     UserAnswerCreate,
+    paginate,
 )
 
-router = APIRouter()
+router = APIRouter(default_response_class=ORJSONResponse)
+
+subjects_adapter = TypeAdapter(list[Subject])
+
+def _etag_matches(if_none_match: str | None, etag: str) -> bool:
+    """判断 If-None-Match 是否命中 ETag（弱比较，支持多个值和 *）"""
+    if not if_none_match:
+        return False
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate == "*" or candidate.removeprefix("W/") == etag:
+            return True
+    return False
+
+def _is_correct(question: models.Question, user_answer: str) -> bool:
+    """判断用户答案是否正确"""
+    return user_answer.strip().lower() == question.correct_answer.strip().lower()
+
+async def _get_question(db: AsyncSession, question_id: int) -> models.Question | None:
+    """按ID查询题目，并预先加载学科（异步会话中不能懒加载关系）"""
+    return await db.scalar(
+        select(models.Question)
+        .options(selectinload(models.Question.subject))
+        .where(models.Question.id == question_id)
+        .execution_options(populate_existing=True)
+    )
 
 # 学科相关接口
 @router.get("/subjects", response_model=list[Subject])
-async def get_subjects(db: Session = Depends(get_db)):
-    """获取所有学科"""
-    subjects = db.query(models.Subject).all()
-    return subjects
+async def get_subjects(request: Request, db: AsyncSession = Depends(get_async_db)):
+    """获取所有学科（支持 If-None-Match 条件请求）"""
+    cached = subjects_cache.get("all")
+    if cached is None:
+        result = await db.scalars(select(models.Subject))
+        # 与 response_model 相同的序列化方式，保证时间格式等输出与其他接口一致
+        body = subjects_adapter.dump_json(
+            subjects_adapter.validate_python(result.all(), from_attributes=True)
+        )
+        # ETag 由响应内容计算，多个 worker 之间保持一致；GZip 中间件可能压缩响应体，
+        # 同一 ETag 对应多种编码表示，因此只能作为弱校验器
+        cached = (f'W/"{hashlib.sha1(body).hexdigest()}"', body)
+        subjects_cache.set("all", cached)
+
+    etag, body = cached
+    if _etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers={"ETag": etag})
+    return Response(content=body, media_type="application/json", headers={"ETag": etag})
 
-@router.post("/subjects", response_model=Subject)
+@router.post("/subjects", response_model=Subject, dependencies=[Depends(get_current_active_user)])
 async def create_subject(
     subject: SubjectCreate,
-    db: Session = Depends(get_db),
-    current_user: models.User = Depends(get_current_active_user)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """创建学科（管理员功能）"""
-    db_subject = models.Subject(**subject.dict())
+    db_subject = models.Subject(**subject.model_dump())
     db.add(db_subject)
-    db.commit()
-    db.refresh(db_subject)
+    await db.commit()
+    await db.refresh(db_subject)
+    subjects_cache.clear()
     return db_subject
 
 @router.get("/subjects/{subject_id}", response_model=Subject)
 async def get_subject(
     subject_id: int,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """获取单个学科详情"""
-    subject = db.query(models.Subject).filter(models.Subject.id == subject_id).first()
+    subject = await db.get(models.Subject, subject_id)
     if not subject:
         raise HTTPException(status_code=404, detail="学科不存在")
     return subject
 
-@router.delete("/subjects/{subject_id}")
+@router.delete("/subjects/{subject_id}", dependencies=[Depends(get_current_active_user)])
 async def delete_subject(
     subject_id: int,
-    db: Session = Depends(get_db),
-    current_user: models.User = Depends(get_current_active_user)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """删除学科（管理员功能）- 级联删除相关题目和题库"""
-    subject = db.query(models.Subject).filter(models.Subject.id == subject_id).first()
+    subject = await db.get(models.Subject, subject_id)
     if not subject:
         raise HTTPException(status_code=404, detail="学科不存在")
     
-    # 统计要删除的数据
-    question_count = db.query(models.Question).filter(models.Question.subject_id == subject_id).count()
-    question_bank_count = db.query(models.QuestionBank).filter(models.QuestionBank.subject_id == subject_id).count()
-    
-    # 获取该学科下的所有题库ID
-    question_bank_ids = db.query(models.QuestionBank.id).filter(models.QuestionBank.subject_id == subject_id).all()
-    question_bank_ids_list = [qb.id for qb in question_bank_ids]
-    
-    # 获取所有相关的题目ID（包括属于该学科的题目和引用该学科题库的题目）
-    question_ids_by_subject = db.query(models.Question.id).filter(models.Question.subject_id == subject_id).all()
-    question_ids_by_bank = []
-    if question_bank_ids_list:
-        question_ids_by_bank = db.query(models.Question.id).filter(models.Question.question_bank_id.in_(question_bank_ids_list)).all()
-    
-    # 合并所有题目ID
-    all_question_ids = list(set([q.id for q in question_ids_by_subject] + [q.id for q in question_ids_by_bank]))
-    
+    # 属于该学科的题目，以及引用该学科题库的题目，均通过子查询在数据库端筛选
+    bank_ids = select(models.QuestionBank.id).where(models.QuestionBank.subject_id == subject_id)
+    related_questions = or_(
+        models.Question.subject_id == subject_id,
+        models.Question.question_bank_id.in_(bank_ids)
+    )
+
+    # 统计要删除的数据（一次查询）
+    question_count, question_bank_count = (await db.execute(select(
+        select(func.count()).select_from(models.Question).where(
+            models.Question.subject_id == subject_id
+        ).scalar_subquery(),
+        select(func.count()).select_from(models.QuestionBank).where(
+            models.QuestionBank.subject_id == subject_id
+        ).scalar_subquery(),
+    ))).one()
+
     # 级联删除：先删除用户答题记录
-    if all_question_ids:
-        db.query(models.UserAnswer).filter(models.UserAnswer.question_id.in_(all_question_ids)).delete(synchronize_session=False)
-    
+    await db.execute(
+        delete(models.UserAnswer).where(
+            models.UserAnswer.question_id.in_(select(models.Question.id).where(related_questions))
+        ).execution_options(synchronize_session=False)
+    )
+
     # 删除所有相关题目（包括属于该学科的和引用该学科题库的）
-    if all_question_ids:
-        db.query(models.Question).filter(models.Question.id.in_(all_question_ids)).delete(synchronize_session=False)
-    
+    await db.execute(
+        delete(models.Question).where(related_questions).execution_options(synchronize_session=False)
+    )
+
     # 删除题库
-    db.query(models.QuestionBank).filter(models.QuestionBank.subject_id == subject_id).delete(synchronize_session=False)
-    
+    await db.execute(
+        delete(models.QuestionBank).where(
+            models.QuestionBank.subject_id == subject_id
+        ).execution_options(synchronize_session=False)
+    )
+
     # 删除学科
-    db.delete(subject)
-    db.commit()
+    await db.delete(subject)
+    await db.commit()
+    subjects_cache.clear()
+    question_cache.clear()
+    # 批量删除了多个用户的答题记录，所有用户的学习统计都可能失效
+    study_stats_cache.clear()
     
     return {
         "message": "学科删除成功",
@@ -107,7 +165,7 @@ async def delete_subject(
     }
 
 # 题目相关接口
-@router.get("/", response_model=PaginatedResponse[Question])
+@router.get("/", response_model=PaginatedResponse[Question], dependencies=[Depends(get_current_active_user)])
 async def get_questions(
     page: int = Query(1, ge=1),
     size: int = Query(20, ge=1, le=100),
@@ -115,152 +173,148 @@ async def get_questions(
     subject_id: str | None = Query(None),
     question_type: str | None = Query(None),
     difficulty: int | None = Query(None),
-    db: Session = Depends(get_db),
-    current_user: models.User = Depends(get_current_active_user)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """获取题目列表（管理员查看，包含答案）"""
-    query = db.query(models.Question)
+    filters = []
 
     # 处理subject_id参数，将空字符串转换为None
     if subject_id and subject_id.strip():
         try:
             subject_id_int = int(subject_id)
-            query = query.filter(models.Question.subject_id == subject_id_int)
+            filters.append(models.Question.subject_id == subject_id_int)
         except ValueError:
             pass  # 忽略无效的subject_id
     
     if question_bank_id:
-        query = query.filter(models.Question.question_bank_id == question_bank_id)
+        filters.append(models.Question.question_bank_id == question_bank_id)
     
     if question_type and question_type.strip():
-        query = query.filter(models.Question.question_type == question_type)
+        filters.append(models.Question.question_type == question_type)
     if difficulty:
-        query = query.filter(models.Question.difficulty == difficulty)
+        filters.append(models.Question.difficulty == difficulty)
 
-    # 获取总数
-    total = query.count()
-    
     # 计算分页参数
     skip = (page - 1) * size
-    questions = query.offset(skip).limit(size).all()
+
+    # 总数通过窗口函数 COUNT(*) OVER () 随分页数据一起返回，省去单独的计数查询
+    result = await db.execute(
+        select(models.Question, func.count().over().label("total"))
+        .options(selectinload(models.Question.subject))
+        .where(*filters)
+        .offset(skip)
+        .limit(size)
+    )
+    rows = result.all()
+    questions = [row.Question for row in rows]
+
+    if rows:
+        total = rows[0].total
+    elif skip == 0:
+        total = 0
+    else:
+        # 页码超出范围时没有返回行，只能单独计数
+        total = await db.scalar(select(func.count()).select_from(models.Question).where(*filters))
     
-    # 返回分页响应
-    return PaginatedResponse.create(questions, total, page, size)
+    # 返回分页响应：返回字典而不是模型实例，避免先构造模型、再被 FastAPI 转回字典后重复校验
+    return paginate(questions, total, page, size)
 
-@router.get("/questions/for-app", response_model=list[QuestionForApp])
+@router.get("/questions/for-app", response_model=list[QuestionForApp], dependencies=[Depends(get_current_active_user)])
 async def get_questions_for_app(
     subject_id: int | None = Query(None),
     difficulty: int | None = Query(None),
     skip: int = Query(0, ge=0),
     limit: int = Query(20, ge=1, le=100),
-    db: Session = Depends(get_db),
-    current_user: models.User = Depends(get_current_active_user)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """获取题目列表（APP使用，不包含答案）"""
-    query = db.query(models.Question)
+    stmt = select(models.Question).options(selectinload(models.Question.subject))
 
     if subject_id:
-        query = query.filter(models.Question.subject_id == subject_id)
+        stmt = stmt.where(models.Question.subject_id == subject_id)
     if difficulty:
-        query = query.filter(models.Question.difficulty == difficulty)
-
-    questions = query.offset(skip).limit(limit).all()
-
-    # 转换为APP格式（移除正确答案和解析）
-    app_questions = []
-    for q in questions:
-        app_question = QuestionForApp(
-            id=q.id,
-            subject_id=q.subject_id,
-            title=q.title,
-            content=q.content,
-            question_type=q.question_type,
-            options=q.options,
-            difficulty=q.difficulty,
-            tags=q.tags,
-            subject=q.subject
-        )
-        app_questions.append(app_question)
+        stmt = stmt.where(models.Question.difficulty == difficulty)
+
+    result = await db.scalars(stmt.offset(skip).limit(limit))
+    questions = result.all()
 
-    return app_questions
+    # 直接返回 ORM 对象，由 response_model=QuestionForApp 一次性完成校验并过滤掉正确答案和解析，
+    # 无需先逐条构造模型再被 FastAPI 重复校验
+    return questions
 
-@router.post("/questions", response_model=Question)
+@router.post("/questions", response_model=Question, dependencies=[Depends(get_current_active_user)])
 async def create_question(
     question: QuestionCreate,
-    db: Session = Depends(get_db),
-    current_user: models.User = Depends(get_current_active_user)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """创建题目（管理员功能）"""
     # 验证学科是否存在
-    subject = db.query(models.Subject).filter(
-        models.Subject.id == question.subject_id
-    ).first()
+    subject = await db.get(models.Subject, question.subject_id)
     if not subject:
         raise HTTPException(status_code=404, detail="Subject not found")
 
-    db_question = models.Question(**question.dict())
+    db_question = models.Question(**question.model_dump())
     db.add(db_question)
-    db.commit()
-    db.refresh(db_question)
-    return db_question
+    await db.commit()
+    return await _get_question(db, db_question.id)
 
-@router.get("/questions/{question_id}", response_model=Question)
+@router.get("/questions/{question_id}", response_model=Question, dependencies=[Depends(get_current_active_user)])
 async def get_question(
     question_id: int,
-    db: Session = Depends(get_db),
-    current_user: models.User = Depends(get_current_active_user)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """获取单个题目详情"""
-    question = db.query(models.Question).filter(
-        models.Question.id == question_id
-    ).first()
+    cached = question_cache.get(question_id)
+    if cached is not None:
+        return cached
+
+    question = await _get_question(db, question_id)
     if not question:
         raise HTTPException(status_code=404, detail="Question not found")
-    return question
+    result = Question.model_validate(question)
+    question_cache.set(question_id, result)
+    return result
 
-@router.put("/questions/{question_id}", response_model=Question)
+@router.put("/questions/{question_id}", response_model=Question, dependencies=[Depends(get_current_active_user)])
 async def update_question(
     question_id: int,
     question_update: QuestionUpdate,
-    db: Session = Depends(get_db),
-    current_user: models.User = Depends(get_current_active_user)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """更新题目（管理员功能）"""
-    question = db.query(models.Question).filter(
-        models.Question.id == question_id
-    ).first()
+    question = await db.get(models.Question, question_id)
     if not question:
         raise HTTPException(status_code=404, detail="Question not found")
 
-    update_data = question_update.dict(exclude_unset=True)
+    update_data = question_update.model_dump(exclude_unset=True)
     for field, value in update_data.items():
         setattr(question, field, value)
 
-    db.commit()
-    db.refresh(question)
-    return question
+    await db.commit()
+    question_cache.pop(question_id)
+    return await _get_question(db, question_id)
 
-@router.delete("/questions/{question_id}")
+@router.delete("/questions/{question_id}", dependencies=[Depends(get_current_active_user)])
 async def delete_question(
     question_id: int,
-    db: Session = Depends(get_db),
-    current_user: models.User = Depends(get_current_active_user)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """删除题目（管理员功能）"""
-    question = db.query(models.Question).filter(
-        models.Question.id == question_id
-    ).first()
+    question = await db.get(models.Question, question_id)
     if not question:
         raise HTTPException(status_code=404, detail="Question not found")
     
     # 删除相关的用户答题记录
-    db.query(models.UserAnswer).filter(
-        models.UserAnswer.question_id == question_id
-    ).delete()
+    await db.execute(
+        delete(models.UserAnswer).where(models.UserAnswer.question_id == question_id)
+    )
     
     # 删除题目
-    db.delete(question)
-    db.commit()
+    await db.delete(question)
+    await db.commit()
+    question_cache.pop(question_id)
+    # 该题目下所有用户的答题记录已删除，学习统计随之失效
+    study_stats_cache.clear()
     return {"message": "题目删除成功"}
 
 # 答题相关接口
@@ -268,35 +322,33 @@ async def delete_question(
 async def submit_answer(
     question_id: int,
     answer_data: UserAnswerCreate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: models.User = Depends(get_current_active_user)
 ):
     """提交答案"""
     # 验证题目是否存在
-    question = db.query(models.Question).filter(
-        models.Question.id == question_id
-    ).first()
+    question = await db.get(models.Question, question_id)
     if not question:
         raise HTTPException(status_code=404, detail="Question not found")
 
-    # 检查是否已经答过这道题
-    existing_answer = db.query(models.UserAnswer).filter(
-        and_(
-            models.UserAnswer.user_id == current_user.id,
-            models.UserAnswer.question_id == question_id
-        )
-    ).first()
-
     # 判断答案是否正确
-    is_correct = answer_data.user_answer.strip().lower() == question.correct_answer.strip().lower()
-
-    if existing_answer:
-        # 更新已有答案
-        existing_answer.user_answer = answer_data.user_answer
-        existing_answer.is_correct = is_correct
-        existing_answer.time_spent = answer_data.time_spent
-        db.commit()
-    else:
+    is_correct = _is_correct(question, answer_data.user_answer)
+
+    # 已答过则直接在数据库端更新（一条 UPDATE，无需先查询再修改）
+    result = await db.execute(
+        update(models.UserAnswer).where(
+            and_(
+                models.UserAnswer.user_id == current_user.id,
+                models.UserAnswer.question_id == question_id
+            )
+        ).values(
+            user_answer=answer_data.user_answer,
+            is_correct=is_correct,
+            time_spent=answer_data.time_spent
+        ).execution_options(synchronize_session=False)
+    )
+
+    if result.rowcount == 0:
         # 创建新答案记录
         db_answer = models.UserAnswer(
             user_id=current_user.id,
@@ -306,7 +358,8 @@ async def submit_answer(
             time_spent=answer_data.time_spent
         )
         db.add(db_answer)
-        db.commit()
+    await db.commit()
+    study_stats_cache.pop(current_user.id)
 
     return AnswerResult(
         is_correct=is_correct,
@@ -315,23 +368,104 @@ async def submit_answer(
         user_answer=answer_data.user_answer
     )
 
+@router.post("/answers/batch", response_model=list[AnswerResult])
+async def submit_answers_batch(
+    batch: UserAnswerBatchCreate,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: models.User = Depends(get_current_active_user)
+):
+    """批量提交答案：一次查询取回题目和已有答题记录，在同一个事务中写入"""
+    question_ids = {answer.question_id for answer in batch.answers}
+    questions = {
+        question.id: question
+        for question in await db.scalars(
+            select(models.Question).where(models.Question.id.in_(question_ids))
+        )
+    }
+    missing = question_ids - questions.keys()
+    if missing:
+        raise HTTPException(status_code=404, detail=f"Question not found: {sorted(missing)}")
+
+    answered_ids = set(await db.scalars(
+        select(models.UserAnswer.question_id).where(
+            models.UserAnswer.user_id == current_user.id,
+            models.UserAnswer.question_id.in_(question_ids)
+        )
+    ))
+
+    results = []
+    # 同一题目提交多次时以最后一次为准
+    rows = {}
+    for answer in batch.answers:
+        question = questions[answer.question_id]
+        is_correct = _is_correct(question, answer.user_answer)
+        rows[answer.question_id] = {
+            "question_id": answer.question_id,
+            "user_answer": answer.user_answer,
+            "is_correct": is_correct,
+            "time_spent": answer.time_spent,
+        }
+        results.append(AnswerResult(
+            is_correct=is_correct,
+            correct_answer=question.correct_answer,
+            explanation=question.explanation,
+            user_answer=answer.user_answer
+        ))
+
+    update_rows = [
+        {
+            "b_question_id": row["question_id"],
+            "b_user_answer": row["user_answer"],
+            "b_is_correct": row["is_correct"],
+            "b_time_spent": row["time_spent"],
+        }
+        for question_id, row in rows.items() if question_id in answered_ids
+    ]
+    insert_rows = [
+        {"user_id": current_user.id, **row}
+        for question_id, row in rows.items() if question_id not in answered_ids
+    ]
+
+    # 已答过的题目用 executemany 批量 UPDATE，新题目用多行 INSERT
+    if update_rows:
+        table = models.UserAnswer.__table__
+        await db.execute(
+            update(table).where(
+                table.c.user_id == current_user.id,
+                table.c.question_id == bindparam("b_question_id")
+            ).values(
+                user_answer=bindparam("b_user_answer"),
+                is_correct=bindparam("b_is_correct"),
+                time_spent=bindparam("b_time_spent")
+            ),
+            update_rows
+        )
+    if insert_rows:
+        await db.execute(insert(models.UserAnswer), insert_rows)
+    await db.commit()
+    study_stats_cache.pop(current_user.id)
+
+    return results
+
 @router.get("/my-answers", response_model=list[UserAnswer])
 async def get_my_answers(
     subject_id: int | None = Query(None),
     skip: int = Query(0, ge=0),
     limit: int = Query(50, ge=1, le=100),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: models.User = Depends(get_current_active_user)
 ):
     """获取我的答题记录"""
-    query = db.query(models.UserAnswer).filter(
+    stmt = select(models.UserAnswer).where(
         models.UserAnswer.user_id == current_user.id
     )
 
     if subject_id:
-        query = query.join(models.Question).filter(
+        stmt = stmt.join(models.Question).where(
             models.Question.subject_id == subject_id
         )
 
-    answers = query.order_by(models.UserAnswer.created_at.desc()).offset(skip).limit(limit).all()
-    return answers
+    result = await db.scalars(
+        stmt.order_by(models.UserAnswer.created_at.desc()).offset(skip).limit(limit)
+    )
+    return result.all()
@@ -2,22 +2,29 @@
 
 提供JWT令牌生成、验证和用户认证相关功能。
 """
+import hashlib
+import time
 from datetime import datetime, timedelta
 
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
 from jose import JWTError, jwt
 from passlib.context import CryptContext
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.core.cache import TTLCache
 from app.core.config import settings
 from app.db import models
-from app.db.database import get_db
+from app.db.database import get_async_db
 from app.schemas.auth import TokenData
 
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 security = HTTPBearer()
 
+# 已验证令牌的缓存，键为令牌的 SHA-256 摘要，避免每个请求都重新解码和验签 JWT
+token_cache = TTLCache(ttl=60, maxsize=1024)
+
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     """验证密码"""
     return pwd_context.verify(plain_password, hashed_password)
@@ -48,6 +55,15 @@ def create_refresh_token(data: dict):
 
 def verify_token(token: str, token_type: str = "access") -> TokenData | None:
     """验证令牌"""
+    cache_key = (hashlib.sha256(token.encode()).digest(), token_type)
+    cached = token_cache.get(cache_key)
+    if cached is not None:
+        expires_at, token_data = cached
+        # 缓存条目不能比令牌本身活得更久
+        if expires_at > time.time():
+            return token_data
+        token_cache.pop(cache_key)
+
     try:
         payload = jwt.decode(token, settings.JWT_SECRET, algorithms=[settings.JWT_ALGORITHM])
         username: str = payload.get("sub")
@@ -57,15 +73,20 @@ def verify_token(token: str, token_type: str = "access") -> TokenData | None:
             return None
             
         token_data = TokenData(username=username)
+        token_cache.set(cache_key, (payload.get("exp", 0), token_data))
         return token_data
     except JWTError:
         return None
 
-def get_current_user(
+async def get_current_user(
     credentials: HTTPAuthorizationCredentials = Depends(security),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ) -> models.User:
-    """获取当前用户"""
+    """获取当前用户
+
+    与异步端点共用同一个请求级会话（FastAPI 按请求缓存依赖），
+    端点提前关闭会话时认证查询占用的连接也一并归还。
+    """
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
@@ -76,14 +97,20 @@ def get_current_user(
     if token_data is None:
         raise credentials_exception
 
-    user = db.query(models.User).filter(models.User.username == token_data.username).first()
+    user = await db.scalar(
+        select(models.User).where(models.User.username == token_data.username).limit(1)
+    )
     if user is None:
         raise credentials_exception
 
     return user
 
-def get_current_active_user(current_user: models.User = Depends(get_current_user)) -> models.User:
-    """获取当前活跃用户"""
+async def get_current_active_user(current_user: models.User = Depends(get_current_user)) -> models.User:
+    """获取当前活跃用户
+
+    只做内存中的字段检查，声明为 async 让 FastAPI 直接在事件循环中执行，
+    不必为每个请求调度一次线程池。
+    """
     if not current_user.is_active:
         raise HTTPException(status_code=400, detail="Inactive user")
     return current_user
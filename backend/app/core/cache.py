@@ -0,0 +1,64 @@
+"""进程内缓存模块
+
+提供带过期时间的轻量级内存缓存，用于缓存变化缓慢的查询结果。
+"""
+import threading
+import time
+from typing import Any
+
+
+class TTLCache:
+    """带过期时间（TTL）的内存缓存
+
+    同步依赖和端点在线程池中并发执行，读写都在锁内完成。
+    """
+
+    def __init__(self, ttl: float, maxsize: int = 128):
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self._data: dict[Any, tuple[float, Any]] = {}
+        self._lock = threading.Lock()
+
+    def get(self, key: Any, default: Any = None) -> Any:
+        """获取缓存值，过期或不存在时返回默认值"""
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return default
+            expires_at, value = item
+            if expires_at < time.monotonic():
+                self._data.pop(key, None)
+                return default
+            return value
+
+    def set(self, key: Any, value: Any) -> None:
+        """写入缓存值"""
+        with self._lock:
+            if len(self._data) >= self.maxsize and key not in self._data:
+                # 淘汰最早写入的条目
+                self._data.pop(next(iter(self._data)), None)
+            self._data[key] = (time.monotonic() + self.ttl, value)
+
+    def pop(self, key: Any) -> None:
+        """删除单个缓存值"""
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self) -> None:
+        """清空缓存"""
+        with self._lock:
+            self._data.clear()
+
+
+# 学习统计是前端仪表盘的轮询接口，按用户缓存，答题或新增学习记录时失效
+study_stats_cache = TTLCache(ttl=30, maxsize=1024)
+
+# 学科列表变化很少，短时间缓存以合并前端频繁的刷新请求；
+# 缓存的是序列化后的响应体及其 ETag，新增或删除学科时失效
+subjects_cache = TTLCache(ttl=30, maxsize=1)
+
+# 题目详情按ID缓存，题目被修改或删除时失效
+question_cache = TTLCache(ttl=60, maxsize=1024)
+
+# AI对话历史按用户缓存，产生新的对话记录时失效
+conversation_cache = TTLCache(ttl=30, maxsize=1024)
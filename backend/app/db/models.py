@@ -3,16 +3,17 @@
 包含所有数据库表的SQLAlchemy模型定义。
 """
 from sqlalchemy import (
-    JSON,
     Boolean,
     Column,
     DateTime,
     ForeignKey,
+    Index,
     Integer,
     String,
     Text,
     text,
 )
+from sqlalchemy.dialects.postgresql import JSONB
 from sqlalchemy.orm import relationship
 
 from app.db.database import Base
@@ -22,7 +23,7 @@ class User(Base):
     """用户模型"""
     __tablename__ = "users"
 
-    id = Column(Integer, primary_key=True, index=True)
+    id = Column(Integer, primary_key=True)
     username = Column(String(50), unique=True, index=True, nullable=False)
     email = Column(String(100), unique=True, index=True, nullable=False)
     hashed_password = Column(String(255), nullable=False)
@@ -38,7 +39,7 @@ class Subject(Base):
     """学科模型"""
     __tablename__ = "subjects"
 
-    id = Column(Integer, primary_key=True, index=True)
+    id = Column(Integer, primary_key=True)
     name = Column(String(100), nullable=False)
     description = Column(Text)
     created_at = Column(DateTime(timezone=True), server_default=text('now()'))
@@ -50,17 +51,17 @@ class Question(Base):
     """题目模型"""
     __tablename__ = "questions"
 
-    id = Column(Integer, primary_key=True, index=True)
+    id = Column(Integer, primary_key=True)
     subject_id = Column(Integer, ForeignKey("subjects.id"), nullable=False)
     question_bank_id = Column(Integer, ForeignKey("question_banks.id"), nullable=True)
     title = Column(Text, nullable=False)
     content = Column(Text, nullable=False)
     question_type = Column(String(20), nullable=False)  # single_choice, multiple_choice, essay
-    options = Column(JSON)  # 选择题选项
+    options = Column(JSONB)  # 选择题选项
     correct_answer = Column(Text)  # 正确答案
     explanation = Column(Text)  # 解析
     difficulty = Column(Integer, default=1)  # 难度等级 1-5
-    tags = Column(JSON)  # 标签
+    tags = Column(JSONB)  # 标签
     created_at = Column(DateTime(timezone=True), server_default=text('now()'))
     updated_at = Column(DateTime(timezone=True), onupdate=text('now()'))
 
@@ -72,8 +73,14 @@ class Question(Base):
 class UserAnswer(Base):
     """用户答题记录"""
     __tablename__ = "user_answers"
-
-    id = Column(Integer, primary_key=True, index=True)
+    __table_args__ = (
+        # 按“用户 + 题目”查找答题记录
+        Index("ix_user_answers_user_question", "user_id", "question_id"),
+        # 按用户列出答题记录并按时间倒序
+        Index("ix_user_answers_user_created", "user_id", "created_at"),
+    )
+
+    id = Column(Integer, primary_key=True)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
     question_id = Column(Integer, ForeignKey("questions.id"), nullable=False)
     user_answer = Column(Text, nullable=False)
@@ -88,8 +95,12 @@ class UserAnswer(Base):
 class StudyRecord(Base):
     """学习记录"""
     __tablename__ = "study_records"
+    __table_args__ = (
+        # 按用户获取最近的学习记录
+        Index("ix_study_records_user_study_date", "user_id", "study_date"),
+    )
 
-    id = Column(Integer, primary_key=True, index=True)
+    id = Column(Integer, primary_key=True)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
     subject_id = Column(Integer, ForeignKey("subjects.id"))
     study_date = Column(DateTime(timezone=True), server_default=text('now()'))
@@ -105,7 +116,7 @@ class QuestionBank(Base):
     """题库模型"""
     __tablename__ = "question_banks"
 
-    id = Column(Integer, primary_key=True, index=True)
+    id = Column(Integer, primary_key=True)
     subject_id = Column(Integer, ForeignKey("subjects.id"), nullable=True)
     name = Column(String(200), nullable=False)
     description = Column(Text)
@@ -124,8 +135,12 @@ class QuestionBank(Base):
 class AIConversation(Base):
     """AI对话记录"""
     __tablename__ = "ai_conversations"
+    __table_args__ = (
+        # 按用户获取最近的对话历史
+        Index("ix_ai_conversations_user_created", "user_id", "created_at"),
+    )
 
-    id = Column(Integer, primary_key=True, index=True)
+    id = Column(Integer, primary_key=True)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
     question_id = Column(Integer, ForeignKey("questions.id"))
     user_message = Column(Text, nullable=False)
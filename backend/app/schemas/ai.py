@@ -4,7 +4,7 @@
 """
 from datetime import datetime
 
-from pydantic import BaseModel
+from pydantic import BaseModel, ConfigDict
 
 
 class AIMessageBase(BaseModel):
@@ -21,8 +21,7 @@ class AIMessage(AIMessageBase):
     ai_response: str
     created_at: datetime
 
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True)
 
 class AIStreamRequest(BaseModel):
     message: str
@@ -48,8 +47,7 @@ class StudyRecord(StudyRecordBase):
     user_id: int
     study_date: datetime
 
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True)
 
 class StudyStats(BaseModel):
     total_questions: int
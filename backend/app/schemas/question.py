@@ -5,7 +5,7 @@
 from datetime import datetime
 from typing import Any, Generic, TypeVar
 
-from pydantic import BaseModel
+from pydantic import BaseModel, ConfigDict, Field
 
 T = TypeVar('T')
 
@@ -21,8 +21,7 @@ class Subject(SubjectBase):
     id: int
     created_at: datetime
 
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True)
 
 class QuestionBase(BaseModel):
     title: str
@@ -57,8 +56,7 @@ class Question(QuestionBase):
     updated_at: datetime | None = None
     subject: Subject
 
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True)
 
 class QuestionForApp(BaseModel):
     """用于APP的题目格式（不包含正确答案）"""
@@ -73,8 +71,7 @@ class QuestionForApp(BaseModel):
     tags: list[str] | None = None
     subject: Subject
 
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True)
 
 class UserAnswerBase(BaseModel):
     question_id: int
@@ -84,14 +81,17 @@ class UserAnswerBase(BaseModel):
 class UserAnswerCreate(UserAnswerBase):
     pass
 
+class UserAnswerBatchCreate(BaseModel):
+    """批量提交答案"""
+    answers: list[UserAnswerCreate] = Field(..., min_length=1, max_length=200)
+
 class UserAnswer(UserAnswerBase):
     id: int
     user_id: int
     is_correct: bool | None = None
     created_at: datetime
 
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True)
 
 class AnswerResult(BaseModel):
     is_correct: bool
@@ -107,14 +107,17 @@ class PaginatedResponse(BaseModel, Generic[T]):
     size: int
     pages: int
 
-    @classmethod
-    def create(cls, items: list[T], total: int, page: int, size: int) -> "PaginatedResponse[T]":
-        """创建分页响应"""
-        pages = (total + size - 1) // size  # 向上取整
-        return cls(
-            items=items,
-            total=total,
-            page=page,
-            size=size,
-            pages=pages
-        )
+def paginate(items: list[Any], total: int, page: int, size: int) -> dict[str, Any]:
+    """构造分页响应数据
+
+    返回普通字典而不是 PaginatedResponse 实例，由端点的 response_model
+    对 ORM 对象只做一次校验和序列化。
+    """
+    pages = (total + size - 1) // size  # 向上取整
+    return {
+        "items": items,
+        "total": total,
+        "page": page,
+        "size": size,
+        "pages": pages,
+    }
@@ -4,7 +4,7 @@
 from datetime import datetime
 from typing import Any, Optional, TYPE_CHECKING
 
-from pydantic import BaseModel
+from pydantic import BaseModel, ConfigDict
 
 if TYPE_CHECKING:
     from .question import Subject
@@ -36,8 +36,7 @@ class QuestionBank(QuestionBankBase):
     updated_at: datetime | None = None
     subject: Optional["Subject"] = None
 
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True)
 
 class QuestionBankImportRequest(BaseModel):
     """题库导入请求"""
@@ -2,10 +2,12 @@
 
 提供与AI模型交互的功能，包括生成题目等。
 """
-import json
-from collections.abc import AsyncGenerator
+import asyncio
+from collections.abc import AsyncGenerator, Awaitable, Callable
+from typing import Any
 
 import httpx
+import orjson
 from fastapi import HTTPException
 
 from app.core.config import settings
@@ -21,6 +23,43 @@ class AIService:
             "Authorization": f"Bearer {self.api_key}",
             "Content-Type": "application/json"
         }
+        # 正在进行中的相同请求共享同一个任务
+        self._inflight: dict[tuple[Any, ...], asyncio.Future[str]] = {}
+        # HTTP客户端在首次调用时创建并复用，保持与AI服务的连接
+        self._client: httpx.AsyncClient | None = None
+        # 限制同时进行的AI请求数，超出的请求排队等待，避免压垮AI服务
+        self._semaphore = asyncio.Semaphore(settings.AI_MAX_CONCURRENCY)
+
+    def _get_client(self) -> httpx.AsyncClient:
+        """获取共享的HTTP客户端"""
+        if self._client is None:
+            self._client = httpx.AsyncClient(timeout=30.0)
+        return self._client
+
+    async def aclose(self) -> None:
+        """关闭HTTP客户端"""
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    async def _coalesce(
+        self, key: tuple[Any, ...], factory: Callable[[], Awaitable[str]]
+    ) -> str:
+        """合并并发的相同请求，只向AI服务发起一次调用"""
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(factory())
+            self._inflight[key] = task
+            task.add_done_callback(lambda _: self._inflight.pop(key, None))
+        # shield：某个等待方取消时不影响其他共享该任务的请求
+        return await asyncio.shield(task)
+
+    async def _collect(self, prompt: str, user_id: str) -> str:
+        """收集流式响应的完整内容"""
+        chunks = []
+        async for chunk in self.stream_chat(prompt, user_id):
+            chunks.append(chunk)
+        return "".join(chunks)
 
     async def stream_chat(
         self,
@@ -42,34 +81,40 @@ class AIService:
             payload["inputs"]["context"] = context
 
         try:
-            async with httpx.AsyncClient(timeout=30.0) as client:
-                async with client.stream(
-                    "POST",
-                    f"{self.base_url}/v1/chat-messages",
-                    headers=self.headers,
-                    json=payload
-                ) as response:
-                    if response.status_code != 200:
-                        raise HTTPException(
-                            status_code=response.status_code,
-                            detail=f"AI service error: {response.text}"
-                        )
-
-                    async for line in response.aiter_lines():
-                        if line.startswith("data: "):
-                            data_str = line[6:]  # Remove "data: " prefix
-                            if data_str.strip() == "[DONE]":
-                                break
-
-                            try:
-                                data = json.loads(data_str)
-                                if data.get("event") == "message":
-                                    content = data.get("answer", "")
-                                    if content:
-                                        yield content
-                            except json.JSONDecodeError:
-                                continue
-
+            async with self._semaphore, self._get_client().stream(
+                "POST",
+                f"{self.base_url}/v1/chat-messages",
+                headers=self.headers,
+                json=payload
+            ) as response:
+                if response.status_code != 200:
+                    # 流式响应需要先读取完响应体才能访问 text
+                    await response.aread()
+                    # 上游状态码只写进错误信息，统一返回502，
+                    # 避免AI服务的401/403被前端当成登录失效
+                    raise HTTPException(
+                        status_code=502,
+                        detail=f"AI service error ({response.status_code}): {response.text}"
+                    )
+
+                async for line in response.aiter_lines():
+                    if line.startswith("data: "):
+                        data_str = line[6:]  # Remove "data: " prefix
+                        if data_str.strip() == "[DONE]":
+                            break
+
+                        try:
+                            data = orjson.loads(data_str)
+                            if data.get("event") == "message":
+                                content = data.get("answer", "")
+                                if content:
+                                    yield content
+                        except orjson.JSONDecodeError:
+                            continue
+
+        except HTTPException:
+            # 上面构造的502错误直接向上传递，不再被包装成500
+            raise
         except httpx.RequestError as e:
             raise HTTPException(
                 status_code=500,
@@ -99,12 +144,9 @@ class AIService:
         请分析用户答案的对错，并提供详细的解题思路和知识点解释。
         """
 
-        chunks = []
-        async for chunk in self.stream_chat(prompt, user_id):
-            chunks.append(chunk)
-        full_response = "".join(chunks)
-
-        return full_response
+        return await self._coalesce(
+            ("explanation", user_id, prompt), lambda: self._collect(prompt, user_id)
+        )
 
     async def get_hint(
         self,
@@ -120,11 +162,8 @@ class AIService:
         请提供解题思路和相关知识点的提示。
         """
 
-        chunks = []
-        async for chunk in self.stream_chat(prompt, user_id):
-            chunks.append(chunk)
-        full_response = "".join(chunks)
-
-        return full_response
+        return await self._coalesce(
+            ("hint", user_id, prompt), lambda: self._collect(prompt, user_id)
+        )
 
 ai_service = AIService()
@@ -19,6 +19,8 @@ class MigrationService:
     def __init__(self):
         self.alembic_dir = Path(__file__).parent.parent.parent / "alembic"
         self.versions_dir = self.alembic_dir / "versions"
+        # 迁移脚本在进程生命周期内只会因 generate_migration 改变，缓存 head 版本
+        self._head_revision: str | None = None
 
     def check_database_exists(self) -> bool:
         """检查数据库是否存在"""
@@ -53,6 +55,8 @@ class MigrationService:
 
     def get_head_revision(self) -> str | None:
         """获取最新的迁移版本"""
+        if self._head_revision is not None:
+            return self._head_revision
         try:
             result = subprocess.run(
                 ["alembic", "heads"],
@@ -64,7 +68,8 @@ class MigrationService:
             output = result.stdout.strip()
             if output:
                 # 提取版本号（通常是第一个单词）
-                return output.split()[0]
+                self._head_revision = output.split()[0]
+                return self._head_revision
             return None
         except subprocess.CalledProcessError as e:
             logger.error("Failed to get head revision: %s", e)
@@ -127,6 +132,7 @@ class MigrationService:
                 check=True
             )
             logger.info("Migration generation output: %s", result.stdout)
+            self._head_revision = None
             return True
         except subprocess.CalledProcessError as e:
             logger.error("Failed to generate migration: %s", e.stderr)
@@ -1,9 +1,11 @@
 """题库服务模块，提供题库管理和题目导入功能。"""
-import json
+import html
 import logging
 import re
 from typing import Any, Dict
 
+import orjson
+from sqlalchemy import func, insert, select
 from sqlalchemy.orm import Session
 
 from app.db import models
@@ -11,6 +13,40 @@ from app.schemas.question_bank import QuestionImportItem
 
 logger = logging.getLogger(__name__)
 
+# 题目类型映射表：导入时每道题都要查询，在模块加载时构建一次
+QUESTION_TYPE_MAPPING = {
+    1: "single_choice",  # 单选题
+    2: "multiple_choice",  # 多选题
+    3: "essay",  # 问答题
+    9: "single_choice",  # 填空题当作单选处理
+}
+
+SHOW_TYPE_NAME_MAPPING = {
+    "单选题": "single_choice",
+    "多选题": "multiple_choice",
+    "判断题": "true_false",
+    "填空题": "fill_blank",
+    "简答题": "short_answer",
+    "问答题": "short_answer",
+    "essay": "short_answer"
+}
+
+QUESTION_TYPE_STRING_MAPPING = {
+    "single_choice": "single_choice",
+    "multiple_choice": "multiple_choice",
+    "essay": "short_answer",
+    "填空题": "fill_blank",
+    "单选题": "single_choice",
+    "多选题": "multiple_choice",
+    "问答题": "short_answer"
+}
+
+# html.unescape 会把 &nbsp; 解码为不换行空格，统一转成普通空格
+NBSP_TRANSLATION = str.maketrans({"\xa0": " "})
+
+# 导入时每个字段都要清理HTML标签，正则在模块加载时编译一次
+HTML_TAG_PATTERN = re.compile(r'<[^>]+>')
+
 
 class QuestionBankService:
     """题库服务类"""
@@ -34,10 +70,10 @@ class QuestionBankService:
         self.db.refresh(question_bank)
         return question_bank
 
-    def parse_question_bank_file(self, file_content: str) -> list[QuestionImportItem]:
-        """解析题库JSON文件"""
+    def parse_question_bank_file(self, file_content: str | bytes) -> list[QuestionImportItem]:
+        """解析题库JSON文件（接受UTF-8字节或字符串）"""
         try:
-            data = json.loads(file_content)
+            data = orjson.loads(file_content)
             questions = []
             
             for item in data:
@@ -89,7 +125,7 @@ class QuestionBankService:
                 questions.append(question_item)
             
             return questions
-        except json.JSONDecodeError as e:
+        except orjson.JSONDecodeError as e:
             logger.error("JSON解析错误: %s", e)
             raise ValueError(f"JSON文件格式错误: {e}") from e
         except (ValueError, TypeError) as e:
@@ -113,8 +149,17 @@ class QuestionBankService:
         imported_count = 0
         failed_count = 0
         errors = []
+        question_rows = []
         
         try:
+            # 一次 IN 查询取回已存在的题目标题，避免逐题查询
+            existing_titles = set()
+            titles = {question_item.title for question_item in questions}
+            if titles:
+                existing_titles = set(self.db.scalars(
+                    select(models.Question.title).where(models.Question.title.in_(titles))
+                ))
+            
             for question_item in questions:
                 try:
                     # 使用题库所属的学科ID，而不是根据section_name自动创建学科
@@ -122,29 +167,25 @@ class QuestionBankService:
                         raise ValueError("题库未关联学科，无法导入题目")
                     
                     # 检查题目是否已存在（根据原始question_id）
-                    existing_question = self.db.query(models.Question).filter(
-                        models.Question.title == question_item.title
-                    ).first()
-                    
-                    if existing_question:
+                    if question_item.title in existing_titles:
                         logger.info("题目已存在，跳过: %s...", question_item.title[:50])
                         continue
                     
-                    # 创建新题目
-                    question = models.Question(
-                        subject_id=question_bank.subject_id,
-                        question_bank_id=question_bank.id,
-                        title=question_item.title,
-                        content=question_item.content,
-                        question_type=self._map_question_type_from_item(question_item.question_type, question_item.show_type_name),
-                        options=question_item.options,
-                        correct_answer=question_item.correct_answer,
-                        explanation=question_item.explanation,
-                        difficulty=1,
-                        tags=[question_item.section_name] if question_item.section_name else []
-                    )
-                    
-                    self.db.add(question)
+                    # 收集新题目，稍后批量插入
+                    question_rows.append({
+                        "subject_id": question_bank.subject_id,
+                        "question_bank_id": question_bank.id,
+                        "title": question_item.title,
+                        "content": question_item.content,
+                        "question_type": self._map_question_type_from_item(
+                            question_item.question_type, question_item.show_type_name
+                        ),
+                        "options": question_item.options,
+                        "correct_answer": question_item.correct_answer,
+                        "explanation": question_item.explanation,
+                        "difficulty": 1,
+                        "tags": [question_item.section_name] if question_item.section_name else []
+                    })
                     imported_count += 1
                     
                 except (ValueError, TypeError, AttributeError, KeyError) as e:
@@ -153,7 +194,9 @@ class QuestionBankService:
                     errors.append(error_msg)
                     logger.error("导入题目失败: %s", str(e))
             
-            # 批量提交
+            # 批量插入并提交：executemany 会合并为多行 INSERT，避免逐个 ORM 对象 flush
+            if question_rows:
+                self.db.execute(insert(models.Question), question_rows)
             self.db.commit()
             
             # 更新题库状态
@@ -177,109 +220,22 @@ class QuestionBankService:
             self.db.commit()
             raise e
 
-    def _get_or_create_subject(self, section_name: str) -> models.Subject:
-        """获取或创建学科"""
-        if not section_name:
-            section_name = "未分类"
-        
-        # 智能提取学科名称
-        subject_name = self._extract_subject_name(section_name)
-        
-        subject = self.db.query(models.Subject).filter(
-            models.Subject.name == subject_name
-        ).first()
-        
-        if not subject:
-            subject = models.Subject(
-                name=subject_name,
-                description=f"从题库导入: {section_name}"
-            )
-            self.db.add(subject)
-            self.db.flush()  # 获取ID但不提交事务
-        
-        return subject
-    
-    def _extract_subject_name(self, section_name: str) -> str:
-        """智能提取学科名称"""
-        # 去掉版本信息
-        name = re.sub(r'（第.*?版）', '', section_name)
-        
-        # 定义学科映射规则
-        subject_mapping = {
-            '计算机系统基础知识': '计算机系统',
-            '信息系统基础知识': '信息系统',
-            '信息安全技术基础知识': '信息安全',
-            '软件工程基础知识': '软件工程',
-            '数据库设计基础知识': '数据库',
-            '系统架构设计基础知识': '系统架构',
-            '系统质量属性与架构评估': '架构评估',
-            '软件可靠性基础知识': '软件可靠性',
-            '软件架构的演化和维护': '架构演化',
-            '未来信息综合技术': '综合技术',
-            '信息系统架构设计理论与实践': '信息系统架构',
-            '层次式架构设计理论与实践': '层次式架构',
-            '云原生架构设计理论与实践': '云原生架构',
-            '面向服务架构设计理论与实践': 'SOA架构',
-            '嵌入式系统架构设计理论与实践': '嵌入式架构',
-            '通信系统架构设计理论与实践': '通信架构',
-            '安全架构设计理论与实践': '安全架构',
-            '大数据架构设计理论与实践': '大数据架构',
-            '绪论': '软件架构基础'
-        }
-        
-        # 尝试匹配映射规则
-        for key, value in subject_mapping.items():
-            if key in name:
-                return value
-        
-        # 如果没有匹配到，使用第一个部分作为学科名称
-        if ' - ' in name:
-            return name.split(' - ')[0].strip()
-        
-        return name.strip() if name.strip() else '未分类'
-
-
-
     def _map_question_type(self, question_type: int) -> str:
         """映射题目类型"""
-        type_mapping = {
-            1: "single_choice",  # 单选题
-            2: "multiple_choice",  # 多选题
-            3: "essay",  # 问答题
-            9: "single_choice",  # 填空题当作单选处理
-        }
-        return type_mapping.get(question_type, "single_choice")
+        return QUESTION_TYPE_MAPPING.get(question_type, "single_choice")
     
     def _map_question_type_from_item(self, question_type, show_type_name: str = "") -> str:
         """从导入项映射题目类型"""
         # 优先使用show_type_name字段
         if show_type_name:
-            type_name_mapping = {
-                "单选题": "single_choice",
-                "多选题": "multiple_choice",
-                "判断题": "true_false",
-                "填空题": "fill_blank",
-                "简答题": "short_answer",
-                "问答题": "short_answer",
-                "essay": "short_answer"
-            }
-            mapped_type = type_name_mapping.get(show_type_name, "")
+            mapped_type = SHOW_TYPE_NAME_MAPPING.get(show_type_name, "")
             if mapped_type:
                 return mapped_type
         
         # 如果show_type_name没有匹配到，使用原有逻辑
         if isinstance(question_type, str):
             # 如果是字符串，直接返回或映射
-            string_mapping = {
-                "single_choice": "single_choice",
-                "multiple_choice": "multiple_choice",
-                "essay": "short_answer",
-                "填空题": "fill_blank",
-                "单选题": "single_choice",
-                "多选题": "multiple_choice",
-                "问答题": "short_answer"
-            }
-            return string_mapping.get(question_type, "single_choice")
+            return QUESTION_TYPE_STRING_MAPPING.get(question_type, "single_choice")
         if isinstance(question_type, int):
             return self._map_question_type(question_type)
         return "single_choice"
@@ -306,30 +262,30 @@ class QuestionBankService:
         elif not isinstance(content, str):
             content = str(content)
         
-        # 简单的HTML标签清理
-        content = re.sub(r'<[^>]+>', '', content)
-        content = content.replace('&nbsp;', ' ')
-        content = content.replace('&lt;', '<')
-        content = content.replace('&gt;', '>')
-        content = content.replace('&amp;', '&')
+        # 简单的HTML标签清理，再一次性解码所有HTML实体
+        content = HTML_TAG_PATTERN.sub('', content)
+        content = html.unescape(content).translate(NBSP_TRANSLATION)
         return content.strip()
 
     def get_question_banks(
         self, skip: int = 0, limit: int = 100, subject_id: int | None = None
     ) -> list[models.QuestionBank]:
         """获取题库列表"""
-        query = self.db.query(models.QuestionBank)
+        # 题目数量通过分组聚合与题库一并查询，避免逐个题库执行 COUNT
+        query = self.db.query(
+            models.QuestionBank,
+            func.count(models.Question.id).label("question_count")
+        ).outerjoin(
+            models.Question, models.Question.question_bank_id == models.QuestionBank.id
+        ).group_by(models.QuestionBank.id)
         if subject_id is not None:
             query = query.filter(models.QuestionBank.subject_id == subject_id)
-        question_banks = query.offset(skip).limit(limit).all()
+        rows = query.offset(skip).limit(limit).all()
         
-        # 为每个题库计算实际题目数量
-        for question_bank in question_banks:
-            # 计算特定题库的题目数量
-            actual_count = self.db.query(models.Question).filter(
-                models.Question.question_bank_id == question_bank.id
-            ).count()
-            question_bank.question_count = actual_count
+        question_banks = []
+        for question_bank, question_count in rows:
+            question_bank.question_count = question_count
+            question_banks.append(question_bank)
         
         return question_banks
 
@@ -340,10 +296,16 @@ class QuestionBankService:
         ).first()
 
     def delete_question_bank(self, question_bank_id: int) -> bool:
-        """删除题库"""
-        question_bank = self.get_question_bank(question_bank_id)
-        if question_bank:
-            self.db.delete(question_bank)
-            self.db.commit()
-            return True
-        return False
\ No newline at end of file
+        """删除题库
+
+        题库下的题目保留，只解除关联。直接在数据库端批量更新和删除，
+        避免 ORM 为解除关联先把题库下的全部题目加载到内存。
+        """
+        self.db.query(models.Question).filter(
+            models.Question.question_bank_id == question_bank_id
+        ).update({models.Question.question_bank_id: None}, synchronize_session=False)
+        deleted = self.db.query(models.QuestionBank).filter(
+            models.QuestionBank.id == question_bank_id
+        ).delete(synchronize_session=False)
+        self.db.commit()
+        return deleted > 0
\ No newline at end of file
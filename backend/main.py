@@ -1,12 +1,17 @@
 import logging
 import sys
+from contextlib import asynccontextmanager
 
+import orjson
 import uvicorn
-from fastapi import FastAPI
+from fastapi import FastAPI, Response
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.middleware.gzip import GZipMiddleware
 
 from app.api.v1.api import api_router
 from app.core.config import settings
+from app.db.database import async_engine, engine
+from app.services.ai_service import ai_service
 from app.services.migration_service import migration_service
 from app.schemas.question_bank import rebuild_models
 
@@ -26,15 +31,24 @@ try:
     logger.info("Rebuilding Pydantic models...")
     rebuild_models()
     logger.info("Pydantic models rebuilt successfully")
-except Exception as e:
-    logger.error(f"Database migration check failed with exception: {e}")
+except Exception:
+    logger.exception("Database migration check failed")
     sys.exit(1)
 
+@asynccontextmanager
+async def lifespan(_app: FastAPI):
+    """应用生命周期：关闭时释放数据库连接池和AI服务的HTTP连接"""
+    yield
+    await ai_service.aclose()
+    engine.dispose()
+    await async_engine.dispose()
+
 app = FastAPI(
     title="AI Study Platform API",
     description="AI驱动的学习平台后端API",
     version="1.0.0",
-    openapi_url=f"{settings.API_V1_STR}/openapi.json"
+    openapi_url=f"{settings.API_V1_STR}/openapi.json",
+    lifespan=lifespan
 )
 
 # Set up CORS
@@ -46,16 +60,23 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# 压缩较大的JSON响应（题目列表、题库列表等）；SSE 流式响应不会被压缩
+app.add_middleware(GZipMiddleware, minimum_size=1000, compresslevel=5)
+
 # Include API router
 app.include_router(api_router, prefix=settings.API_V1_STR)
 
+# 固定响应体在模块加载时序列化一次，请求时直接返回字节
+ROOT_RESPONSE = orjson.dumps({"message": "AI Study Platform API"})
+HEALTH_RESPONSE = orjson.dumps({"status": "healthy"})
+
 @app.get("/")
 async def root():
-    return {"message": "AI Study Platform API"}
+    return Response(content=ROOT_RESPONSE, media_type="application/json")
 
 @app.get("/health")
 async def health_check():
-    return {"status": "healthy"}
+    return Response(content=HEALTH_RESPONSE, media_type="application/json")
 
 if __name__ == "__main__":
     uvicorn.run(
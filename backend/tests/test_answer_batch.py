@@ -0,0 +1,112 @@
+"""批量提交答案接口测试"""
+import pytest
+from fastapi import HTTPException
+from pydantic import ValidationError
+
+from app.api.v1.endpoints.questions import submit_answers_batch
+from app.core.cache import study_stats_cache
+from app.db import models
+from app.schemas.question import UserAnswerBatchCreate
+
+
+class FakeSession:
+    """按调用顺序返回 scalars 结果，并记录执行的写语句"""
+
+    def __init__(self, *scalars_results):
+        self.scalars_results = list(scalars_results)
+        self.executed = []
+        self.committed = False
+
+    async def scalars(self, _stmt):
+        return self.scalars_results.pop(0)
+
+    async def execute(self, stmt, params=None):
+        self.executed.append((stmt, params))
+
+    async def commit(self):
+        self.committed = True
+
+    def statements(self, kind):
+        return [params for stmt, params in self.executed if getattr(stmt, kind)]
+
+
+def make_question(question_id, correct_answer="A"):
+    return models.Question(id=question_id, correct_answer=correct_answer, explanation=f"解析{question_id}")
+
+
+def make_batch(*answers):
+    return UserAnswerBatchCreate(answers=[
+        {"question_id": question_id, "user_answer": user_answer, "time_spent": 5}
+        for question_id, user_answer in answers
+    ])
+
+
+@pytest.fixture
+def user():
+    return models.User(id=7, username="tester", is_active=True)
+
+
+@pytest.mark.asyncio
+async def test_duplicate_question_ids_keep_last_answer(user):
+    # 题目 1 尚未作答，同一批次中提交了两次
+    db = FakeSession([make_question(1)], [])
+
+    results = await submit_answers_batch(make_batch((1, "B"), (1, "a")), db=db, current_user=user)
+
+    # 每个提交都有对应的判题结果
+    assert [result.is_correct for result in results] == [False, True]
+    # 写入时以最后一次提交为准，只插入一行
+    assert db.statements("is_update") == []
+    [insert_rows] = db.statements("is_insert")
+    assert insert_rows == [{
+        "user_id": 7,
+        "question_id": 1,
+        "user_answer": "a",
+        "is_correct": True,
+        "time_spent": 5,
+    }]
+    assert db.committed
+
+
+@pytest.mark.asyncio
+async def test_mixed_batch_updates_existing_and_inserts_new(user):
+    # 题目 1 已作答过，题目 2 是新题
+    study_stats_cache.set(user.id, "stale")
+    db = FakeSession([make_question(1), make_question(2, "B")], [1])
+
+    results = await submit_answers_batch(make_batch((1, "A"), (2, "C")), db=db, current_user=user)
+
+    assert [result.is_correct for result in results] == [True, False]
+    [update_rows] = db.statements("is_update")
+    assert update_rows == [{
+        "b_question_id": 1,
+        "b_user_answer": "A",
+        "b_is_correct": True,
+        "b_time_spent": 5,
+    }]
+    [insert_rows] = db.statements("is_insert")
+    assert [row["question_id"] for row in insert_rows] == [2]
+    assert db.committed
+    # 写入后学习统计缓存失效
+    assert study_stats_cache.get(user.id) is None
+
+
+@pytest.mark.asyncio
+async def test_unknown_question_returns_404(user):
+    db = FakeSession([make_question(1)])
+
+    with pytest.raises(HTTPException) as exc_info:
+        await submit_answers_batch(make_batch((1, "A"), (99, "A")), db=db, current_user=user)
+
+    assert exc_info.value.status_code == 404
+    assert "99" in exc_info.value.detail
+    assert db.executed == []
+    assert not db.committed
+
+
+def test_batch_size_is_bounded():
+    with pytest.raises(ValidationError):
+        UserAnswerBatchCreate(answers=[])
+    with pytest.raises(ValidationError):
+        make_batch(*[(question_id, "A") for question_id in range(201)])
+    assert len(make_batch(*[(question_id, "A") for question_id in range(200)]).answers) == 200